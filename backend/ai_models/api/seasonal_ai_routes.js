@@ -15,25 +15,29 @@ const AI_MODELS_DIR = path.join(__dirname, '..');
 router.get('/health', (req, res) => {
   // Check if trained models exist
   const trainedModelsDir = path.join(AI_MODELS_DIR, 'trained_models');
-  const requiredModels = [
-    'breeding_model.pkl',
-    'activity_model.pkl',
-    'threat_model.pkl',
-    'behavior_model.pkl',
-    'population_model.pkl'
+  // Either the single model bundle, or one forest per target from older training runs
+  const modelLayouts = [
+    ['seasonal_bundle.joblib'],
+    [
+      'breeding_model.pkl',
+      'activity_model.pkl',
+      'threat_model.pkl',
+      'behavior_model.pkl',
+      'population_model.pkl'
+    ]
   ];
 
   console.log('Health check - AI_MODELS_DIR:', AI_MODELS_DIR);
   console.log('Health check - trainedModelsDir:', trainedModelsDir);
   
   const modelStatus = {};
-  const modelsExist = requiredModels.every(model => {
+  modelLayouts.flat().forEach(model => {
     const modelPath = path.join(trainedModelsDir, model);
     const exists = fs.existsSync(modelPath);
     modelStatus[model] = { exists, path: modelPath };
     console.log(`Model ${model}: ${exists ? 'EXISTS' : 'MISSING'} at ${modelPath}`);
-    return exists;
   });
+  const modelsExist = modelLayouts.some(layout => layout.every(model => modelStatus[model].exists));
 
   res.json({
     status: 'ok',
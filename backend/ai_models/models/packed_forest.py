@@ -0,0 +1,104 @@
+import numpy as np
+
+# A "packed" forest is a dict of plain numpy arrays, one row per tree:
+#   feature, threshold, children_left, children_right   (n_trees, n_nodes)
+#   value                                               (n_trees, n_nodes, total classes)
+#   classes (one array per output), max_depth
+# Leaves (and the padding after a tree's last node) point back to themselves, so every
+# row can be walked exactly max_depth steps without checking whether it reached a leaf.
+# For multi-output forests each output's class probabilities sit side by side in value,
+# in output order, rather than padding every output to the widest one.
+# Every feature is an integer (a month or a category code), and for integer x the split
+# x <= threshold is the same as x <= floor(threshold), so thresholds are stored floored
+# and, like the indices, in the smallest integer dtype that holds them.
+
+
+def _smallest_int_dtype(values):
+    """Smallest signed integer dtype holding every value"""
+    for dtype in (np.int8, np.int16, np.int32):
+        if np.iinfo(dtype).min <= values.min() and values.max() <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+# Rows walked together by forest_proba; bounds its (rows, trees, classes) array of leaf
+# probabilities, so batch memory doesn't grow with rows x trees x classes
+ROW_BLOCK = 256
+
+
+def pack_forest(model):
+    """Flatten a fitted (single- or multi-output) RandomForestClassifier into packed numpy arrays"""
+    trees = [estimator.tree_ for estimator in model.estimators_]
+    n_trees = len(trees)
+    n_nodes = max(tree.node_count for tree in trees)
+    classes = model.classes_ if model.n_outputs_ > 1 else [model.classes_]
+    offsets = np.cumsum([0] + [len(output_classes) for output_classes in classes])
+
+    feature = np.zeros((n_trees, n_nodes), dtype=np.int64)
+    threshold = np.zeros((n_trees, n_nodes), dtype=np.int64)
+    children_left = np.tile(np.arange(n_nodes, dtype=np.int64), (n_trees, 1))
+    children_right = children_left.copy()
+    value = np.zeros((n_trees, n_nodes, offsets[-1]), dtype=np.float32)
+
+    for i, tree in enumerate(trees):
+        splits = np.flatnonzero(tree.children_left != -1)
+        feature[i, splits] = tree.feature[splits]
+        threshold[i, splits] = np.floor(tree.threshold[splits])
+        children_left[i, splits] = tree.children_left[splits]
+        children_right[i, splits] = tree.children_right[splits]
+
+        # Store class probabilities per node and output (older sklearn keeps raw counts here)
+        for output in range(len(classes)):
+            start, end = offsets[output], offsets[output + 1]
+            counts = tree.value[:, output, :end - start]
+            value[i, :tree.node_count, start:end] = counts / counts.sum(axis=1, keepdims=True)
+
+    return {
+        'feature': feature.astype(_smallest_int_dtype(feature)),
+        'threshold': threshold.astype(_smallest_int_dtype(threshold)),
+        'children_left': children_left.astype(_smallest_int_dtype(children_left)),
+        'children_right': children_right.astype(_smallest_int_dtype(children_right)),
+        'value': value,
+        # Rebuild from lists so string labels get a plain (non-object) numpy dtype
+        'classes': [np.array(output_classes.tolist()) for output_classes in classes],
+        'max_depth': max(tree.max_depth for tree in trees)
+    }
+
+
+def forest_proba(packed, X):
+    """Class probabilities per row of X, every output's classes side by side (see pack_forest)"""
+    feature = packed['feature']
+    threshold = packed['threshold']
+    children_left = packed['children_left']
+    children_right = packed['children_right']
+
+    # Features are integer-valued (see above), so compare them as integers
+    X = np.asarray(X).astype(np.int32)
+    if X.shape[0] > ROW_BLOCK:
+        return np.concatenate([forest_proba(packed, X[start:start + ROW_BLOCK])
+                               for start in range(0, X.shape[0], ROW_BLOCK)])
+
+    trees = np.arange(feature.shape[0])
+    rows = np.arange(X.shape[0])[:, None]
+    node = np.zeros((X.shape[0], feature.shape[0]), dtype=np.intp)
+
+    # Walk all rows through all trees at once, one level per step
+    for _ in range(packed['max_depth']):
+        go_left = X[rows, feature[trees, node]] <= threshold[trees, node]
+        node = np.where(go_left, children_left[trees, node], children_right[trees, node])
+
+    return packed['value'][trees, node].mean(axis=1)
+
+
+def forest_classify(packed, X):
+    """Most likely class and its probability per row and output, from one pass over the trees"""
+    proba = forest_proba(packed, X)
+    labels = []
+    probs = np.empty((X.shape[0], len(packed['classes'])), dtype=proba.dtype)
+    start = 0
+    for output, output_classes in enumerate(packed['classes']):
+        output_proba = proba[:, start:start + len(output_classes)]
+        labels.append(output_classes[output_proba.argmax(axis=1)])
+        probs[:, output] = output_proba.max(axis=1)
+        start += len(output_classes)
+    return labels, probs
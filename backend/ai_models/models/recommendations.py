@@ -0,0 +1,27 @@
+import itertools
+
+
+def _recommend(breeding, high_threat, high_activity, low_activity):
+    """Monitoring recommendation from the predicted conditions; earlier rules take precedence"""
+    if breeding and high_threat:
+        return 'CRITICAL: Increase monitoring - breeding season with high threat level'
+    if breeding:
+        return 'Increase monitoring frequency - active breeding season'
+    if high_threat:
+        return 'Enhanced surveillance recommended - high threat period'
+    if high_activity:
+        return 'Optimal time for population surveys and data collection'
+    if low_activity:
+        return 'Reduced monitoring acceptable - natural low activity period'
+    return 'Continue standard monitoring protocols'
+
+
+# Every (breeding, high threat, high activity, low activity) combination, evaluated once
+_RECOMMENDATIONS = {
+    conditions: _recommend(*conditions) for conditions in itertools.product((False, True), repeat=4)
+}
+
+
+def generate_recommendation(activity, breeding, threat):
+    """Monitoring recommendation for a prediction, looked up in the precomputed table"""
+    return _RECOMMENDATIONS[(bool(breeding), threat == 'high', activity == 'high', activity == 'low')]
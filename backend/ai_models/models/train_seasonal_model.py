@@ -6,39 +6,69 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, mean_squared_error
 import joblib
 import os
+from packed_forest import pack_forest
+from recommendations import generate_recommendation
 
 class SpeciesSeasonalPredictor:
+    # Forest sizes tried by train(), cheapest first; the last entry is the untuned default
+    FOREST_GRID = sorted(
+        [(n_estimators, max_depth) for n_estimators in (10, 25, 50) for max_depth in (4, 6, 8)],
+        key=lambda size: size[0] * size[1]
+    ) + [(100, None)]
+    # How much accuracy a smaller forest may give up against the best candidate
+    ACCURACY_TOLERANCE = 0.005
+    # Columns predicted by the seasonal model, in output order
+    TARGETS = ['breeding_season', 'activity_level', 'threat_level', 'primary_behavior', 'population_peak']
+    
     def __init__(self):
-        self.species_encoder = LabelEncoder()
+        # Feature encoders are the sorted categories of each column (position = code),
+        # taken from pandas' category dtype by prepare_features()
+        self.species_encoder = None
+        self.migration_encoder = None
+        self.weather_encoder = None
+        
         self.behavior_encoder = LabelEncoder()
-        self.migration_encoder = LabelEncoder()
-        self.weather_encoder = LabelEncoder()
+        self.activity_encoder = LabelEncoder()
+        self.threat_encoder = LabelEncoder()
         
-        # Models for different predictions
-        self.breeding_model = RandomForestClassifier(n_estimators=100, random_state=42)
-        self.activity_model = RandomForestClassifier(n_estimators=100, random_state=42)
-        self.threat_model = RandomForestClassifier(n_estimators=100, random_state=42)
-        self.behavior_model = RandomForestClassifier(n_estimators=100, random_state=42)
-        self.population_model = RandomForestClassifier(n_estimators=100, random_state=42)
+        # One multi-output forest predicts every target (sized and fitted by train())
+        self.seasonal_model = None
         
     def prepare_features(self, data, fit_encoders=True):
         """Prepare features for training or prediction"""
         X = data.copy()
         
         if fit_encoders:
-            # Fit encoders during training
-            X['species_encoded'] = self.species_encoder.fit_transform(X['species'])
-            X['migration_encoded'] = self.migration_encoder.fit_transform(X['migration_tendency'])
-            X['weather_encoded'] = self.weather_encoder.fit_transform(X['weather_preference'])
+            # Fit encoders during training: the category dtype sorts and codes each column once
+            species = X['species'].astype('category')
+            migration = X['migration_tendency'].astype('category')
+            weather = X['weather_preference'].astype('category')
+            X['species_encoded'] = species.cat.codes
+            X['migration_encoded'] = migration.cat.codes
+            X['weather_encoded'] = weather.cat.codes
+            
+            # Keep the categories as plain arrays so loading them does not need pandas
+            self.species_encoder = np.array(species.cat.categories.tolist())
+            self.migration_encoder = np.array(migration.cat.categories.tolist())
+            self.weather_encoder = np.array(weather.cat.categories.tolist())
         else:
             # Transform during prediction
-            X['species_encoded'] = self.species_encoder.transform(X['species'])
-            X['migration_encoded'] = self.migration_encoder.transform(X['migration_tendency'])
-            X['weather_encoded'] = self.weather_encoder.transform(X['weather_preference'])
+            X['species_encoded'] = self._encode(X['species'], self.species_encoder)
+            X['migration_encoded'] = self._encode(X['migration_tendency'], self.migration_encoder)
+            X['weather_encoded'] = self._encode(X['weather_preference'], self.weather_encoder)
         
-        # Select features for modeling
+        # Select features for modeling, as the float32 array the forest works on internally
         feature_columns = ['species_encoded', 'month', 'migration_encoded', 'weather_encoded']
-        return X[feature_columns]
+        return X[feature_columns].to_numpy(dtype=np.float32)
+    
+    @staticmethod
+    def _encode(values, categories):
+        """Codes of values within the fitted categories, rejecting categories unseen in training"""
+        codes = pd.Categorical(values, categories=categories).codes
+        if (codes < 0).any():
+            unseen = sorted(set(np.asarray(values)[codes < 0].tolist()))
+            raise ValueError(f"y contains previously unseen labels: {unseen}")
+        return codes
     
     def train(self, csv_path):
         """Train all models using the CSV data"""
@@ -48,66 +78,90 @@ class SpeciesSeasonalPredictor:
         # Prepare features
         X = self.prepare_features(data, fit_encoders=True)
         
-        # Prepare targets
-        y_breeding = data['breeding_season']
-        y_activity = data['activity_level']
-        y_threat = data['threat_level']
-        y_behavior = self.behavior_encoder.fit_transform(data['primary_behavior'])
-        y_population = data['population_peak']
+        # Prepare targets, label-encoding the text columns so they stack into one matrix
+        Y = np.column_stack([
+            data['breeding_season'],
+            self.activity_encoder.fit_transform(data['activity_level']),
+            self.threat_encoder.fit_transform(data['threat_level']),
+            self.behavior_encoder.fit_transform(data['primary_behavior']),
+            data['population_peak']
+        ])
         
         print("Training models...")
         
-        # Train breeding season model
-        self.breeding_model.fit(X, y_breeding)
-        print("✓ Breeding season model trained")
+        # Train one forest for all targets, so a prediction walks one set of trees
+        self.seasonal_model = self._fit_smallest_forest(X, Y)
         
-        # Train activity level model
-        self.activity_model.fit(X, y_activity)
-        print("✓ Activity level model trained")
+        # predict_seasonal_behavior scores one row at a time, where a thread pool only adds overhead
+        self.seasonal_model.set_params(n_jobs=None)
+        print(f"✓ Seasonal model trained for {len(self.TARGETS)} targets ({self._describe(self.seasonal_model)})")
         
-        # Train threat level model
-        self.threat_model.fit(X, y_threat)
-        print("✓ Threat level model trained")
+        # Report how many rows of the table each target gets wrong
+        missed = (self.seasonal_model.predict(X) != Y).sum(axis=0)
+        print("  Rows missed per target: " +
+              ", ".join(f"{target} {count}" for target, count in zip(self.TARGETS, missed)))
         
-        # Train behavior model
-        self.behavior_model.fit(X, y_behavior)
-        print("✓ Behavior model trained")
+        return self
+    
+    def _fit_smallest_forest(self, X, y):
+        """Fit the cheapest forest in FOREST_GRID that scores within ACCURACY_TOLERANCE of the best
         
-        # Train population peak model
-        self.population_model.fit(X, y_population)
-        print("✓ Population peak model trained")
+        The forests serve as a lookup of the seasonal patterns table (most behaviours occur
+        only once or twice), so candidates are scored on how well they reproduce it.
+        Prediction cost grows with n_estimators x depth. On a small table the tolerance is
+        under one row, so a smaller forest is only chosen if it reproduces the table as
+        well as the best one.
+        """
+        candidates = []
+        for n_estimators, max_depth in self.FOREST_GRID:
+            model = RandomForestClassifier(
+                n_estimators=n_estimators, max_depth=max_depth, random_state=42, n_jobs=-1
+            )
+            model.fit(X, y)
+            # With several targets, a candidate is only as good as its worst one
+            score = np.mean(model.predict(X) == y, axis=0).min()
+            candidates.append((score, model))
         
-        return self
+        best_score = max(score for score, _ in candidates)
+        return next(model for score, model in candidates
+                    if score >= best_score - self.ACCURACY_TOLERANCE)
+    
+    @staticmethod
+    def _describe(model):
+        """Short size summary of a fitted forest for training logs"""
+        return f"{model.n_estimators} trees, max depth {model.max_depth or 'unbounded'}"
     
     def predict_seasonal_behavior(self, species, month, migration_tendency=None, weather_preference=None):
         """Predict seasonal behavior for a given species and month"""
-        # Create input data
-        input_data = pd.DataFrame({
-            'species': [species],
-            'month': [month],
-            'migration_tendency': [migration_tendency or 'territorial'],
-            'weather_preference': [weather_preference or 'moderate']
-        })
+        migration_tendency = migration_tendency or 'territorial'
+        weather_preference = weather_preference or 'moderate'
         
         try:
-            # Prepare features
-            X = self.prepare_features(input_data, fit_encoders=False)
-            
-            # Make predictions
-            breeding_season = bool(self.breeding_model.predict(X)[0])
-            activity_level = self.activity_model.predict(X)[0]
-            threat_level = self.threat_model.predict(X)[0]
-            behavior_encoded = self.behavior_model.predict(X)[0]
-            population_peak = bool(self.population_model.predict(X)[0])
+            # Encode straight into a single float32 row instead of building a DataFrame
+            X = np.array([[
+                self._encode([species], self.species_encoder)[0],
+                month,
+                self._encode([migration_tendency], self.migration_encoder)[0],
+                self._encode([weather_preference], self.weather_encoder)[0]
+            ]], dtype=np.float32)
             
-            # Decode behavior
-            primary_behavior = self.behavior_encoder.inverse_transform([behavior_encoded])[0]
+            # One probability pass per target, in TARGETS order; the label is the argmax,
+            # exactly as predict() would pick it, and its probability is the confidence
+            probas = [output_proba[0] for output_proba in self.seasonal_model.predict_proba(X)]
+            best = [output_proba.argmax() for output_proba in probas]
+            breeding, activity, threat, behavior, population = (
+                classes[i] for classes, i in zip(self.seasonal_model.classes_, best)
+            )
+            breeding_prob, activity_prob, threat_prob, behavior_prob, _ = (
+                output_proba[i] for output_proba, i in zip(probas, best)
+            )
+            breeding_season = bool(breeding)
+            population_peak = bool(population)
             
-            # Calculate confidence based on model probability
-            breeding_prob = self.breeding_model.predict_proba(X)[0].max()
-            activity_prob = self.activity_model.predict_proba(X)[0].max()
-            threat_prob = self.threat_model.predict_proba(X)[0].max()
-            behavior_prob = self.behavior_model.predict_proba(X)[0].max()
+            # Decode labels (classes_ is sorted, so index it directly)
+            activity_level = self.activity_encoder.classes_[activity]
+            threat_level = self.threat_encoder.classes_[threat]
+            primary_behavior = self.behavior_encoder.classes_[behavior]
             
             avg_confidence = (breeding_prob + activity_prob + threat_prob + behavior_prob) / 4
             
@@ -122,7 +176,7 @@ class SpeciesSeasonalPredictor:
                 'breedingPeak': population_peak and breeding_season,
                 'activityLevel': activity_level.title(),
                 'threatLevel': threat_level.title(),
-                'migrationTendency': migration_tendency or 'territorial',
+                'migrationTendency': migration_tendency,
                 'populationPeak': population_peak,
                 'recommendation': recommendation,
                 'confidence': f'High - AI Model ({avg_confidence:.2%} confidence)'
@@ -145,51 +199,36 @@ class SpeciesSeasonalPredictor:
     
     def _generate_recommendation(self, behavior, activity, breeding, threat):
         """Generate monitoring recommendations based on predictions"""
-        if breeding and threat == 'high':
-            return 'CRITICAL: Increase monitoring - breeding season with high threat level'
-        if breeding:
-            return 'Increase monitoring frequency - active breeding season'
-        if threat == 'high':
-            return 'Enhanced surveillance recommended - high threat period'
-        if activity == 'high':
-            return 'Optimal time for population surveys and data collection'
-        if activity == 'low':
-            return 'Reduced monitoring acceptable - natural low activity period'
-        return 'Continue standard monitoring protocols'
+        return generate_recommendation(activity, breeding, threat)
+    
+    # Encoders saved alongside the model, by attribute name
+    ENCODERS = ['species_encoder', 'behavior_encoder', 'migration_encoder',
+                'weather_encoder', 'activity_encoder', 'threat_encoder']
     
     def save_models(self, model_dir):
         """Save all trained models and encoders"""
         os.makedirs(model_dir, exist_ok=True)
         
-        # Save models
-        joblib.dump(self.breeding_model, os.path.join(model_dir, 'breeding_model.pkl'))
-        joblib.dump(self.activity_model, os.path.join(model_dir, 'activity_model.pkl'))
-        joblib.dump(self.threat_model, os.path.join(model_dir, 'threat_model.pkl'))
-        joblib.dump(self.behavior_model, os.path.join(model_dir, 'behavior_model.pkl'))
-        joblib.dump(self.population_model, os.path.join(model_dir, 'population_model.pkl'))
+        # Save the fitted sklearn model (only needed to reload it here), compressed to keep it small
+        joblib.dump(self.seasonal_model, os.path.join(model_dir, 'seasonal_model.pkl'), compress=3, protocol=5)
         
-        # Save encoders
-        joblib.dump(self.species_encoder, os.path.join(model_dir, 'species_encoder.pkl'))
-        joblib.dump(self.behavior_encoder, os.path.join(model_dir, 'behavior_encoder.pkl'))
-        joblib.dump(self.migration_encoder, os.path.join(model_dir, 'migration_encoder.pkl'))
-        joblib.dump(self.weather_encoder, os.path.join(model_dir, 'weather_encoder.pkl'))
+        # Save everything the prediction service needs in one file: packed forest and encoders.
+        # Left uncompressed so the service can memory-map its arrays
+        bundle = {name: getattr(self, name) for name in self.ENCODERS}
+        bundle['seasonal_model'] = pack_forest(self.seasonal_model)
+        joblib.dump(bundle, os.path.join(model_dir, 'seasonal_bundle.joblib'), protocol=5)
         
         print(f"All models saved to: {model_dir}")
     
     def load_models(self, model_dir):
         """Load all trained models and encoders"""
-        # Load models
-        self.breeding_model = joblib.load(os.path.join(model_dir, 'breeding_model.pkl'))
-        self.activity_model = joblib.load(os.path.join(model_dir, 'activity_model.pkl'))
-        self.threat_model = joblib.load(os.path.join(model_dir, 'threat_model.pkl'))
-        self.behavior_model = joblib.load(os.path.join(model_dir, 'behavior_model.pkl'))
-        self.population_model = joblib.load(os.path.join(model_dir, 'population_model.pkl'))
+        # Load model
+        self.seasonal_model = joblib.load(os.path.join(model_dir, 'seasonal_model.pkl'))
         
         # Load encoders
-        self.species_encoder = joblib.load(os.path.join(model_dir, 'species_encoder.pkl'))
-        self.behavior_encoder = joblib.load(os.path.join(model_dir, 'behavior_encoder.pkl'))
-        self.migration_encoder = joblib.load(os.path.join(model_dir, 'migration_encoder.pkl'))
-        self.weather_encoder = joblib.load(os.path.join(model_dir, 'weather_encoder.pkl'))
+        bundle = joblib.load(os.path.join(model_dir, 'seasonal_bundle.joblib'))
+        for name in self.ENCODERS:
+            setattr(self, name, bundle[name])
         
         print(f"All models loaded from: {model_dir}")
         return self
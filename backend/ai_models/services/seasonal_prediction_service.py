@@ -1,13 +1,28 @@
 import os
 import sys
-import pandas as pd
+import functools
+import numpy as np
 import joblib
-from sklearn.preprocessing import LabelEncoder
 
-# Add the models directory to the path to import the training module
+# Add the models directory to the path to import the shared model helpers
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'models'))
 
+from packed_forest import pack_forest, forest_classify
+from recommendations import generate_recommendation
+
+def _categories(encoder):
+    """Categories in code order; feature encoders are saved as a plain array, older ones as LabelEncoders"""
+    return getattr(encoder, 'classes_', encoder)
+
+def _classify_single_output(packed, X):
+    """Label and its probability per row, from a forest trained on one target"""
+    (labels,), probs = forest_classify(packed, X)
+    return labels, probs[:, 0]
+
 class SeasonalPredictionService:
+    # Distinct (species, month, migration, weather) predictions kept in memory
+    PREDICTION_CACHE_SIZE = 8192
+    
     def __init__(self, model_dir=None):
         if model_dir is None:
             model_dir = os.path.join(os.path.dirname(__file__), '..', 'trained_models')
@@ -15,7 +30,9 @@ class SeasonalPredictionService:
         self.model_dir = model_dir
         self.models_loaded = False
         
-        # Initialize model containers
+        # Initialize model containers (a single multi-output forest, or one forest per target
+        # for models trained before it was introduced)
+        self.seasonal_model = None
         self.breeding_model = None
         self.activity_model = None
         self.threat_model = None
@@ -27,27 +44,57 @@ class SeasonalPredictionService:
         self.behavior_encoder = None
         self.migration_encoder = None
         self.weather_encoder = None
+        self.activity_encoder = None
+        self.threat_encoder = None
+        
+        # Category -> code lookups built from the encoders
+        self._species_map = {}
+        self._migration_map = {}
+        self._weather_map = {}
+        
+        # The feature space is small and discrete, so repeated queries are answered from
+        # an LRU cache (cleared whenever models are reloaded)
+        self._cached_prediction = functools.lru_cache(maxsize=self.PREDICTION_CACHE_SIZE)(self._predict_one)
         
         # Try to load models on initialization
         self.load_models()
     
     def load_models(self):
         """Load all trained models and encoders"""
+        self._cached_prediction.cache_clear()
         try:
-            # Load models
-            self.breeding_model = joblib.load(os.path.join(self.model_dir, 'breeding_model.pkl'))
-            self.activity_model = joblib.load(os.path.join(self.model_dir, 'activity_model.pkl'))
-            self.threat_model = joblib.load(os.path.join(self.model_dir, 'threat_model.pkl'))
-            self.behavior_model = joblib.load(os.path.join(self.model_dir, 'behavior_model.pkl'))
-            self.population_model = joblib.load(os.path.join(self.model_dir, 'population_model.pkl'))
+            artifacts = self._load_artifacts()
+            
+            # Load models as packed forests
+            self.seasonal_model = artifacts.get('seasonal_model')
+            self.breeding_model = artifacts.get('breeding_model')
+            self.activity_model = artifacts.get('activity_model')
+            self.threat_model = artifacts.get('threat_model')
+            self.behavior_model = artifacts.get('behavior_model')
+            self.population_model = artifacts.get('population_model')
             
             # Load encoders
-            self.species_encoder = joblib.load(os.path.join(self.model_dir, 'species_encoder.pkl'))
-            self.behavior_encoder = joblib.load(os.path.join(self.model_dir, 'behavior_encoder.pkl'))
-            self.migration_encoder = joblib.load(os.path.join(self.model_dir, 'migration_encoder.pkl'))
-            self.weather_encoder = joblib.load(os.path.join(self.model_dir, 'weather_encoder.pkl'))
+            self.species_encoder = artifacts['species_encoder']
+            self.behavior_encoder = artifacts['behavior_encoder']
+            self.migration_encoder = artifacts['migration_encoder']
+            self.weather_encoder = artifacts['weather_encoder']
+            self.activity_encoder = artifacts.get('activity_encoder')
+            self.threat_encoder = artifacts.get('threat_encoder')
+            
+            # Encoding a single value is a dict lookup, not a searchsorted over classes_
+            self._species_map = {c: i for i, c in enumerate(_categories(self.species_encoder))}
+            self._migration_map = {c: i for i, c in enumerate(_categories(self.migration_encoder))}
+            self._weather_map = {c: i for i, c in enumerate(_categories(self.weather_encoder))}
             
             self.models_loaded = True
+            
+            # Warm up with one uncached prediction so the first real request doesn't pay for
+            # paging in the model arrays (this also catches a broken model at load time)
+            species, migration_tendency, weather_preference = (
+                _categories(encoder)[0] for encoder in (self.species_encoder, self.migration_encoder, self.weather_encoder)
+            )
+            self._predict_one(species, 6, migration_tendency, weather_preference)
+            
             print(f"SUCCESS: Models loaded successfully from: {self.model_dir}", file=sys.stderr)
             
         except Exception as e:
@@ -55,41 +102,56 @@ class SeasonalPredictionService:
             print("Models will need to be trained first.", file=sys.stderr)
             self.models_loaded = False
     
+    def _load_artifacts(self):
+        """Models and encoders by name, from the bundle or the older one-pickle-per-object layout"""
+        bundle_path = os.path.join(self.model_dir, 'seasonal_bundle.joblib')
+        if os.path.exists(bundle_path):
+            # Memory-map the arrays (read-only): loading is a map instead of a copy, and
+            # concurrent service processes share one copy of the forest in the page cache
+            return joblib.load(bundle_path, mmap_mode='r')
+        
+        # One forest per target, packed here since these files hold sklearn models
+        artifacts = {}
+        for name in ['breeding_model', 'activity_model', 'threat_model', 'behavior_model', 'population_model']:
+            artifacts[name] = pack_forest(joblib.load(os.path.join(self.model_dir, f'{name}.pkl')))
+        for name in ['species_encoder', 'behavior_encoder', 'migration_encoder', 'weather_encoder']:
+            artifacts[name] = joblib.load(os.path.join(self.model_dir, f'{name}.pkl'))
+        return artifacts
+    
     def prepare_features(self, species, month, migration_tendency=None, weather_preference=None):
         """Prepare features for prediction"""
         if not self.models_loaded:
             raise Exception("Models not loaded. Please train models first.")
         
+        return np.array([self._encode_row(species, month, migration_tendency, weather_preference)],
+                        dtype=np.float32)
+    
+    def _encode_row(self, species, month, migration_tendency, weather_preference):
+        """Encode one query as [species_encoded, month, migration_encoded, weather_encoded]"""
         # Set defaults
         if migration_tendency is None:
             migration_tendency = 'territorial'
         if weather_preference is None:
             weather_preference = 'moderate'
         
-        # Create input data
-        input_data = pd.DataFrame({
-            'species': [species],
-            'month': [month],
-            'migration_tendency': [migration_tendency],
-            'weather_preference': [weather_preference]
-        })
-        
         # Encode features
-        try:
-            input_data['species_encoded'] = self.species_encoder.transform(input_data['species'])
-            input_data['migration_encoded'] = self.migration_encoder.transform(input_data['migration_tendency'])
-            input_data['weather_encoded'] = self.weather_encoder.transform(input_data['weather_preference'])
-        except ValueError as e:
+        species_code = self._species_map.get(species)
+        migration_code = self._migration_map.get(migration_tendency)
+        weather_code = self._weather_map.get(weather_preference)
+        
+        if species_code is None or migration_code is None or weather_code is None:
             # Handle unknown species/categories
-            print(f"Warning: Unknown category encountered - {e}")
+            print(f"Warning: Unknown category encountered - {species}, {migration_tendency}, {weather_preference}",
+                  file=sys.stderr)
             # Use a default encoded value (first category)
-            input_data['species_encoded'] = [0]
-            input_data['migration_encoded'] = [0]
-            input_data['weather_encoded'] = [0]
+            species_code = migration_code = weather_code = 0
+        
+        # The packed forests compare integer features, so only a whole month 1-12 is valid
+        # (7.0 is accepted, 6.7 or None are not)
+        if isinstance(month, bool) or not isinstance(month, (int, float, np.number)) or month not in range(1, 13):
+            raise ValueError(f"Invalid month: {month!r} (expected a whole number from 1 to 12)")
         
-        # Select feature columns
-        feature_columns = ['species_encoded', 'month', 'migration_encoded', 'weather_encoded']
-        return input_data[feature_columns]
+        return [species_code, month, migration_code, weather_code]
     
     def predict_seasonal_behavior(self, species, month, migration_tendency=None, weather_preference=None):
         """Predict seasonal behavior for a given species and month"""
@@ -97,62 +159,75 @@ class SeasonalPredictionService:
             return self._get_fallback_prediction()
         
         try:
-            # Prepare features
-            X = self.prepare_features(species, month, migration_tendency, weather_preference)
-            
-            # Make predictions
-            breeding_season = bool(self.breeding_model.predict(X)[0])
-            activity_level = self.activity_model.predict(X)[0]
-            threat_level = self.threat_model.predict(X)[0]
-            behavior_encoded = self.behavior_model.predict(X)[0]
-            population_peak = bool(self.population_model.predict(X)[0])
+            # Copy so callers can't modify the cached result
+            return dict(self._cached_prediction(species, month, migration_tendency, weather_preference))
             
-            # Decode behavior
-            primary_behavior = self.behavior_encoder.inverse_transform([behavior_encoded])[0]
-            
-            # Calculate confidence based on model probability
-            breeding_prob = self.breeding_model.predict_proba(X)[0].max()
-            activity_prob = self.activity_model.predict_proba(X)[0].max()
-            threat_prob = self.threat_model.predict_proba(X)[0].max()
-            behavior_prob = self.behavior_model.predict_proba(X)[0].max()
-            
-            avg_confidence = (breeding_prob + activity_prob + threat_prob + behavior_prob) / 4
+        except Exception as e:
+            print(f"ERROR: Prediction error: {e}", file=sys.stderr)
+            return self._get_fallback_prediction()
+    
+    def _predict_one(self, species, month, migration_tendency, weather_preference):
+        """Uncached single prediction behind _cached_prediction"""
+        X = self.prepare_features(species, month, migration_tendency, weather_preference)
+        return self._predict_rows(X, [migration_tendency])[0]
+    
+    def _predict_rows(self, X, migration_tendencies):
+        """Predict every row of an encoded feature matrix, one pass per model"""
+        # Make predictions
+        breeding, activity, threat, behavior, population, avg_confidence = self._classify(X)
+        
+        results = []
+        for i, migration_tendency in enumerate(migration_tendencies):
+            breeding_season = bool(breeding[i])
+            population_peak = bool(population[i])
             
             # Generate recommendation
             recommendation = self._generate_recommendation(
-                primary_behavior, activity_level, breeding_season, threat_level
+                behavior[i], activity[i], breeding_season, threat[i]
             )
             
-            return {
-                'primaryBehavior': primary_behavior,
+            results.append({
+                'primaryBehavior': behavior[i],
                 'breedingSeason': breeding_season,
                 'breedingPeak': population_peak and breeding_season,
-                'activityLevel': activity_level.title(),
-                'threatLevel': threat_level.title(),
+                'activityLevel': activity[i].title(),
+                'threatLevel': threat[i].title(),
                 'migrationTendency': migration_tendency or 'territorial',
                 'populationPeak': population_peak,
                 'recommendation': recommendation,
-                'confidence': f'High - AI Model ({avg_confidence:.2%} confidence)',
+                'confidence': f'High - AI Model ({avg_confidence[i]:.2%} confidence)',
                 'success': True
-            }
-            
-        except Exception as e:
-            print(f"ERROR: Prediction error: {e}", file=sys.stderr)
-            return self._get_fallback_prediction()
+            })
+        
+        return results
+    
+    def _classify(self, X):
+        """Decoded label for every target, plus the average confidence, for each row of X"""
+        if self.seasonal_model is not None:
+            # One pass over the multi-output forest; activity and threat come back label-encoded
+            (breeding, activity, threat, behavior_encoded, population), probs = forest_classify(self.seasonal_model, X)
+            activity = self.activity_encoder.classes_[activity]
+            threat = self.threat_encoder.classes_[threat]
+            breeding_prob, activity_prob, threat_prob, behavior_prob = probs[:, 0], probs[:, 1], probs[:, 2], probs[:, 3]
+        else:
+            # One pass over each per-target forest
+            breeding, breeding_prob = _classify_single_output(self.breeding_model, X)
+            activity, activity_prob = _classify_single_output(self.activity_model, X)
+            threat, threat_prob = _classify_single_output(self.threat_model, X)
+            behavior_encoded, behavior_prob = _classify_single_output(self.behavior_model, X)
+            population, _ = _classify_single_output(self.population_model, X)
+        
+        # Decode behavior
+        behavior = self.behavior_encoder.classes_[behavior_encoded]
+        
+        # Calculate confidence based on model probability
+        avg_confidence = (breeding_prob + activity_prob + threat_prob + behavior_prob) / 4
+        
+        return breeding, activity, threat, behavior, population, avg_confidence
     
     def _generate_recommendation(self, behavior, activity, breeding, threat):
         """Generate monitoring recommendations based on predictions"""
-        if breeding and threat == 'high':
-            return 'CRITICAL: Increase monitoring - breeding season with high threat level'
-        if breeding:
-            return 'Increase monitoring frequency - active breeding season'
-        if threat == 'high':
-            return 'Enhanced surveillance recommended - high threat period'
-        if activity == 'high':
-            return 'Optimal time for population surveys and data collection'
-        if activity == 'low':
-            return 'Reduced monitoring acceptable - natural low activity period'
-        return 'Continue standard monitoring protocols'
+        return generate_recommendation(activity, breeding, threat)
     
     def _get_fallback_prediction(self):
         """Return fallback prediction when models are not available"""
@@ -175,27 +250,41 @@ class SeasonalPredictionService:
             return []
         
         try:
-            return list(self.species_encoder.classes_)
+            return list(_categories(self.species_encoder))
         except:
             return []
     
     def batch_predict(self, predictions_list):
         """Make batch predictions for multiple species/month combinations"""
-        results = []
-        for item in predictions_list:
-            species = item.get('species')
-            month = item.get('month')
-            migration = item.get('migration_tendency')
-            weather = item.get('weather_preference')
-            
-            prediction = self.predict_seasonal_behavior(species, month, migration, weather)
-            results.append({
-                'species': species,
-                'month': month,
-                'prediction': prediction
-            })
+        predictions = None
+        if self.models_loaded and predictions_list:
+            try:
+                # Encode every item up front so each model runs once over the whole batch
+                X = np.array([
+                    self._encode_row(item.get('species'), item.get('month'),
+                                     item.get('migration_tendency'), item.get('weather_preference'))
+                    for item in predictions_list
+                ], dtype=np.float32)
+                predictions = self._predict_rows(X, [item.get('migration_tendency') for item in predictions_list])
+            except Exception as e:
+                # Fall back to item-by-item so one bad item does not fail the batch
+                print(f"ERROR: Batch prediction error: {e}", file=sys.stderr)
         
-        return results
+        if predictions is None:
+            predictions = [
+                self.predict_seasonal_behavior(item.get('species'), item.get('month'),
+                                               item.get('migration_tendency'), item.get('weather_preference'))
+                for item in predictions_list
+            ]
+        
+        return [
+            {
+                'species': item.get('species'),
+                'month': item.get('month'),
+                'prediction': prediction
+            }
+            for item, prediction in zip(predictions_list, predictions)
+        ]
 
 # Global service instance
 _service_instance = None
@@ -1,4 +1,4 @@
-import sys, json, os, joblib, pandas as pd
+import sys, json, os, joblib, warnings
 import numpy as np
 
 # Fixed feature order
@@ -9,31 +9,50 @@ FEATURE_ORDER = [
     "family", "adventure", "relaxation"
 ]
 
-# Load trained Random Forest model
+# Load trained Random Forest model once per process
 BASE_DIR = os.path.dirname(__file__)
 model_path = os.path.join(BASE_DIR, "wildpark_recommender.pkl")
 model = joblib.load(model_path)
 
-# Handle input
-try:
-    if len(sys.argv) > 1:
-        user_features = json.loads(sys.argv[1])
-    else:
-        raise ValueError("No JSON input provided")
-except Exception as e:
-    print(json.dumps({"error": f"Invalid input: {e}"}))
-    sys.exit(0)
-
-# Ensure feature order matches model training
-input_vector = [user_features.get(feature, 0) for feature in FEATURE_ORDER]
-input_df = pd.DataFrame([input_vector], columns=FEATURE_ORDER)
-
-# Predict probabilities
-probs = model.predict_proba(input_df)[0]
-classes = model.classes_
-
-# Top 3 recommendations
-top_indices = probs.argsort()[-3:][::-1]
-recommendations = [{"park": classes[i], "score": float(probs[i])} for i in top_indices]
-
-print(json.dumps(recommendations))
+# Rows are always built in FEATURE_ORDER, so sklearn's column-name check on models
+# fitted from a DataFrame only adds a warning
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+
+def predict(user_features):
+    """Return the top 3 park recommendations for one set of user features"""
+    # Ensure feature order matches model training
+    input_vector = [user_features.get(feature, 0) for feature in FEATURE_ORDER]
+    input_arr = np.asarray(input_vector, dtype=np.float32).reshape(1, -1)
+
+    # Predict probabilities
+    probs = model.predict_proba(input_arr)[0]
+    classes = model.classes_
+
+    # Top 3 recommendations
+    top_indices = probs.argsort()[-3:][::-1]
+    return [{"park": classes[i], "score": float(probs[i])} for i in top_indices]
+
+
+def handle(raw):
+    """Parse one JSON request and return a JSON-serialisable response"""
+    try:
+        user_features = json.loads(raw)
+    except Exception as e:
+        return {"error": f"Invalid input: {e}"}
+    return predict(user_features)
+
+
+if len(sys.argv) > 1:
+    # One-shot mode: python predict.py '<json>'
+    print(json.dumps(handle(sys.argv[1])))
+else:
+    # Worker mode: one JSON request per stdin line, one JSON response per stdout line
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            response = handle(line)
+        except Exception as e:
+            response = {"error": f"Prediction failed: {e}"}
+        print(json.dumps(response), flush=True)
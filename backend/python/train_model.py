@@ -1,4 +1,5 @@
 import pandas as pd
+import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 import joblib
@@ -13,8 +14,8 @@ model_path = os.path.join(BASE_DIR, "wildpark_recommender.pkl")
 print("Loading dataset...")
 data = pd.read_csv(csv_path)
 
-# 3️⃣ Prepare features and target
-X = data.drop('park_name', axis=1)
+# 3️⃣ Prepare features and target (a plain float32 array, as predict.py passes it)
+X = data.drop('park_name', axis=1).to_numpy(dtype=np.float32)
 y = data['park_name']
 
 # 4️⃣ Train/test split
@@ -22,9 +23,12 @@ X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_
 
 # 5️⃣ Train Random Forest model
 print("Training model...")
-model = RandomForestClassifier(n_estimators=100, random_state=42)
+model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)
 model.fit(X_train, y_train)
 
+# predict.py scores one row at a time, where a thread pool only adds overhead
+model.set_params(n_jobs=None)
+
 # 6️⃣ Save trained model
-joblib.dump(model, model_path)
+joblib.dump(model, model_path, compress=3, protocol=5)
 print(f"Model trained and saved at: {model_path}")
\ No newline at end of file
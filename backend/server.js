@@ -1375,65 +1375,120 @@ app.get('/api/parks/:id', optionalAuth, async (req, res) => {
 //     });
 //   }
 // });
-app.post('/api/recommend', async (req, res) => {
-  try {
-    const input = JSON.stringify(req.body);
-    const py = spawn('python', ['python/predict.py', input]);
+// Long-lived park recommender: python/predict.py loads the model once and
+// answers one JSON request per stdin line, so each request skips the
+// interpreter start-up and model unpickling.
+let recommender = null;
 
-    let data = '';
-    let error = '';
+function getRecommender() {
+  if (recommender) return recommender;
 
-    py.stdout.on('data', (chunk) => {
-      data += chunk.toString();
-    });
+  const py = spawn('python', [path.join(__dirname, 'python', 'predict.py')], {
+    stdio: ['pipe', 'pipe', 'pipe']
+  });
+  const worker = { py, queue: [], buffer: '' };
+
+  py.stdout.on('data', (chunk) => {
+    worker.buffer += chunk.toString();
+    let newline;
+    while ((newline = worker.buffer.indexOf('\n')) !== -1) {
+      const line = worker.buffer.slice(0, newline);
+      worker.buffer = worker.buffer.slice(newline + 1);
+      // Responses come back in request order
+      const pending = worker.queue.shift();
+      if (!pending) continue;
+      try {
+        pending.resolve(JSON.parse(line));
+      } catch (err) {
+        pending.reject(new Error(`Failed to parse Python output: ${err.message}`));
+      }
+    }
+  });
 
-    py.stderr.on('data', (chunk) => {
-      error += chunk.toString();
-    });
+  py.stderr.on('data', (chunk) => {
+    console.error('[predict.py]', chunk.toString());
+  });
 
-    py.on('close', async (code) => {
-      if (error) {
-        console.error('❌ Python error:', error);
-        return res.status(500).json({ success: false, error });
-      }
+  const shutdown = (reason) => {
+    if (recommender === worker) recommender = null;
+    while (worker.queue.length > 0) {
+      worker.queue.shift().reject(new Error(reason));
+    }
+  };
+  py.on('close', (code) => shutdown(`Recommender process exited with code ${code}`));
+  py.on('error', (err) => shutdown(`Failed to start recommender process: ${err.message}`));
+  py.stdin.on('error', (err) => shutdown(`Recommender input closed: ${err.message}`));
 
-      try {
-        const recommendations = JSON.parse(data);
-        const topParks = recommendations.map((r) => r.park);
+  recommender = worker;
+  return worker;
+}
 
-        console.log('🧭 Top parks to fetch:', topParks);
+// Let the current worker drain and exit; the next request spawns one with the retrained model
+function restartRecommender() {
+  if (recommender) {
+    recommender.py.stdin.end();
+    recommender = null;
+  }
+}
 
-        // ✅ Fetch all park details at once (if ≤10 parks)
-        let parksData = [];
-        if (topParks.length > 0) {
-          const snapshot = await db
-            .collection('parks')
-            .where('name', 'in', topParks)
-            .get();
+function requestRecommendations(features) {
+  return new Promise((resolve, reject) => {
+    const worker = getRecommender();
+    worker.queue.push({ resolve, reject });
+    worker.py.stdin.write(`${JSON.stringify(features)}\n`);
+  });
+}
 
-          snapshot.forEach((doc) => {
-            parksData.push({ id: doc.id, ...doc.data() });
-          });
-        }
+app.post('/api/recommend', async (req, res) => {
+  try {
+    let recommendations;
+    try {
+      recommendations = await requestRecommendations(req.body);
+    } catch (error) {
+      console.error('❌ Python error:', error.message);
+      return res.status(500).json({ success: false, error: error.message });
+    }
 
-        console.log('🦁 Recommended parks full details:', parksData);
+    if (recommendations.error) {
+      console.error('❌ Python error:', recommendations.error);
+      return res.status(500).json({ success: false, error: recommendations.error });
+    }
 
-        res.json({
-          success: true,
-          data: {
-            recommendations,
-            parkDetails: parksData,
-          },
-        });
-      } catch (err) {
-        console.error('Error processing recommendation:', err);
-        res.status(500).json({
-          success: false,
-          error: 'Failed to process recommendation',
-          details: err.message,
+    try {
+      const topParks = recommendations.map((r) => r.park);
+
+      console.log('🧭 Top parks to fetch:', topParks);
+
+      // ✅ Fetch all park details at once (if ≤10 parks)
+      let parksData = [];
+      if (topParks.length > 0) {
+        const snapshot = await db
+          .collection('parks')
+          .where('name', 'in', topParks)
+          .get();
+
+        snapshot.forEach((doc) => {
+          parksData.push({ id: doc.id, ...doc.data() });
         });
       }
-    });
+
+      console.log('🦁 Recommended parks full details:', parksData);
+
+      res.json({
+        success: true,
+        data: {
+          recommendations,
+          parkDetails: parksData,
+        },
+      });
+    } catch (err) {
+      console.error('Error processing recommendation:', err);
+      res.status(500).json({
+        success: false,
+        error: 'Failed to process recommendation',
+        details: err.message,
+      });
+    }
   } catch (err) {
     console.error('Server error:', err);
     res.status(500).json({
@@ -1560,6 +1615,7 @@ app.post('/api/parks', authenticateUser, async (req, res) => {
         });
         py.on('close', (code) => {
           console.log(`train_model.py exited with code ${code}`);
+          if (code === 0) restartRecommender();
         });
       }
     });